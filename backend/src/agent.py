@@ -1,7 +1,14 @@
+# PERF NOTE: each turn is network-bound (STT + LLM + TTS take seconds), while the
+# Python tools below run in microseconds. Optimizations here target event-loop
+# blocking and per-session allocations; there are no numeric kernels, so do not
+# reach for Numba/Cython. An embedding-based matcher, if ever added, is the place
+# where NumPy would pay off.
 import logging
 import json
 import os
 import asyncio
+import textwrap
+import uuid
 from datetime import datetime
 from typing import Annotated, Literal
 from dataclasses import dataclass, field
@@ -23,6 +30,8 @@ from livekit.agents import (
     function_tool,
 )
 
+# Plugins stay at module scope: they register on import (main thread only), and
+# `agent.py download-files` relies on that registration to fetch model files
 from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
@@ -32,24 +41,32 @@ load_dotenv(".env.local")
 # ======================================================
 # 🛒 ORDER MANAGEMENT SYSTEM
 # ======================================================
-@dataclass
+# Required order fields with their customer-facing labels, in the order they are asked
+ORDER_FIELDS = (
+    ("drinkType", "☕ drink type"),
+    ("size", "📏 size"),
+    ("milk", "🥛 milk"),
+    ("extras", "🎯 extras"),
+    ("name", "👤 name"),
+)
+
+@dataclass(slots=True)
 class OrderState:
     """☕ Coffee shop order state with validation"""
     drinkType: str | None = None
     size: str | None = None
     milk: str | None = None
-    extras: list[str] = field(default_factory=list)
+    # None until the customer is asked; set_extras stores [] for "no extras"
+    extras: list[str] | None = None
     name: str | None = None
     
     def is_complete(self) -> bool:
         """✅ Check if all required fields are filled"""
-        return all([
-            self.drinkType is not None,
-            self.size is not None,
-            self.milk is not None,
-            self.extras is not None,
-            self.name is not None
-        ])
+        return all(getattr(self, attr) is not None for attr, _ in ORDER_FIELDS)
+    
+    def missing_fields(self) -> list[str]:
+        """🔍 List the fields that still need to be collected"""
+        return [label for attr, label in ORDER_FIELDS if getattr(self, attr) is None]
     
     def to_dict(self) -> dict:
         """📦 Convert to dictionary for JSON serialization"""
@@ -61,15 +78,18 @@ class OrderState:
             "name": self.name
         }
     
+    def extras_text(self) -> str:
+        """🎯 Render the extras as a trailing ' with ...' phrase, or nothing"""
+        return f" with {', '.join(self.extras)}" if self.extras else ""
+    
     def get_summary(self) -> str:
         """📋 Get friendly order summary"""
         if not self.is_complete():
             return "🔄 Order in progress..."
         
-        extras_text = f" with {', '.join(self.extras)}" if self.extras else ""
-        return f"☕ {self.size.upper()} {self.drinkType.title()} with {self.milk.title()} milk{extras_text} for {self.name}"
+        return f"☕ {self.size.upper()} {self.drinkType.title()} with {self.milk.title()} milk{self.extras_text()} for {self.name}"
 
-@dataclass
+@dataclass(slots=True)
 class Userdata:
     """👤 User session data"""
     order: OrderState
@@ -89,8 +109,7 @@ async def set_drink_type(
 ) -> str:
     """☕ Set the drink type. Call when customer specifies which coffee they want."""
     ctx.userdata.order.drinkType = drink
-    print(f"✅ DRINK SET: {drink.upper()}")
-    print(f"📊 Order Progress: {ctx.userdata.order.get_summary()}")
+    logger.debug("✅ drink set: %s | order: %r", drink, ctx.userdata.order)
     return f"☕ Excellent choice! One {drink} coming up!"
 
 @function_tool
@@ -103,8 +122,7 @@ async def set_size(
 ) -> str:
     """📏 Set the size. Call when customer specifies drink size."""
     ctx.userdata.order.size = size
-    print(f"✅ SIZE SET: {size.upper()}")
-    print(f"📊 Order Progress: {ctx.userdata.order.get_summary()}")
+    logger.debug("✅ size set: %s | order: %r", size, ctx.userdata.order)
     return f"📏 {size.title()} size - perfect for your {ctx.userdata.order.drinkType}!"
 
 @function_tool
@@ -117,8 +135,7 @@ async def set_milk(
 ) -> str:
     """🥛 Set milk preference. Call when customer specifies milk type."""
     ctx.userdata.order.milk = milk
-    print(f"✅ MILK SET: {milk.upper()}")
-    print(f"📊 Order Progress: {ctx.userdata.order.get_summary()}")
+    logger.debug("✅ milk set: %s | order: %r", milk, ctx.userdata.order)
     
     if milk == "none":
         return "🥛 Got it! Black coffee - strong and simple!"
@@ -134,8 +151,7 @@ async def set_extras(
 ) -> str:
     """🎯 Set extras. Call when customer specifies add-ons or says no extras."""
     ctx.userdata.order.extras = extras if extras else []
-    print(f"✅ EXTRAS SET: {ctx.userdata.order.extras}")
-    print(f"📊 Order Progress: {ctx.userdata.order.get_summary()}")
+    logger.debug("✅ extras set: %s | order: %r", ctx.userdata.order.extras, ctx.userdata.order)
     
     if ctx.userdata.order.extras:
         return f"🎯 Added {', '.join(ctx.userdata.order.extras)} - making it special!"
@@ -147,9 +163,11 @@ async def set_name(
     name: Annotated[str, Field(description="👤 Customer's name for the order")],
 ) -> str:
     """👤 Set customer name. Call when customer provides their name."""
-    ctx.userdata.order.name = name.strip().title()
-    print(f"✅ NAME SET: {ctx.userdata.order.name}")
-    print(f"📊 Order Progress: {ctx.userdata.order.get_summary()}")
+    cleaned = " ".join(name.split()).title()
+    if not cleaned:
+        return "👤 Sorry, I didn't catch the name - could you say it again?"
+    ctx.userdata.order.name = cleaned
+    logger.debug("✅ name set: %s | order: %r", ctx.userdata.order.name, ctx.userdata.order)
     return f"👤 Wonderful, {ctx.userdata.order.name}! Almost ready to complete your order!"
 
 @function_tool
@@ -157,37 +175,24 @@ async def complete_order(ctx: RunContext[Userdata]) -> str:
     """🎉 Finalize and save order to JSON. ONLY call when ALL fields are filled."""
     order = ctx.userdata.order
     
-    if not order.is_complete():
-        missing = []
-        if not order.drinkType: missing.append("☕ drink type")
-        if not order.size: missing.append("📏 size")
-        if not order.milk: missing.append("🥛 milk")
-        if order.extras is None: missing.append("🎯 extras")
-        if not order.name: missing.append("👤 name")
-        
-        print(f"❌ CANNOT COMPLETE - Missing: {', '.join(missing)}")
+    missing = order.missing_fields()
+    if missing:
+        logger.info("❌ cannot complete order, missing: %s", missing)
         return f"🔄 Almost there! Just need: {', '.join(missing)}"
     
-    print(f"🎉 ORDER READY FOR COMPLETION: {order.get_summary()}")
-    
     try:
-        save_order_to_json(order)
-        extras_text = f" with {', '.join(order.extras)}" if order.extras else ""
+        # Disk I/O runs in a worker thread so the event loop keeps serving audio
+        await asyncio.to_thread(save_order_to_json, order)
+        logger.info("🎉 order completed for %s", order.name)
         
-        print("\n" + "⭐" * 60)
-        print("🎉 ORDER COMPLETED SUCCESSFULLY!")
-        print(f"👤 Customer: {order.name}")
-        print(f"☕ Order: {order.size} {order.drinkType} with {order.milk} milk{extras_text}")
-        print("⭐" * 60 + "\n")
-        
-        return f"""🎉 PERFECT! Your {order.size} {order.drinkType} with {order.milk} milk{extras_text} is confirmed, {order.name}! 
+        return f"""🎉 PERFECT! Your {order.size} {order.drinkType} with {order.milk} milk{order.extras_text()} is confirmed, {order.name}! 
 
 ⏰ We're preparing your drink now - it'll be ready in 3-5 minutes!
 
 📺 **Thanks for using our AI Barista!** """
         
-    except Exception as e:
-        print(f"❌ ORDER SAVE FAILED: {e}")
+    except Exception:
+        logger.exception("❌ order save failed in %s", ORDERS_FOLDER)
         return "⚠️ Order recorded but there was a small issue. Don't worry, we'll make your drink right away!"
 
 @function_tool
@@ -200,10 +205,8 @@ async def get_order_status(ctx: RunContext[Userdata]) -> str:
     progress = order.get_summary()
     return f"📊 Order in progress: {progress}"
 
-class BaristaAgent(Agent):
-    def __init__(self):
-        super().__init__(
-            instructions="""
+# Built (and dedented) once at import and shared by every session
+BARISTA_INSTRUCTIONS = textwrap.dedent("""
             🏪 You are a FRIENDLY and PROFESSIONAL barista at "coffee wala".
             
             🎯 MISSION: Take coffee orders by systematically collecting:
@@ -229,16 +232,23 @@ class BaristaAgent(Agent):
             - Celebrate when order is complete
             
             🛠️ Use the function tools to record each piece of information.
-            """,
-            tools=[
-                set_drink_type,
-                set_size,
-                set_milk,
-                set_extras,
-                set_name,
-                complete_order,
-                get_order_status,
-            ],
+            """).strip()
+
+BARISTA_TOOLS = [
+    set_drink_type,
+    set_size,
+    set_milk,
+    set_extras,
+    set_name,
+    complete_order,
+    get_order_status,
+]
+
+class BaristaAgent(Agent):
+    def __init__(self):
+        super().__init__(
+            instructions=BARISTA_INSTRUCTIONS,
+            tools=BARISTA_TOOLS,
         )
 
 def create_empty_order():
@@ -248,75 +258,48 @@ def create_empty_order():
 # ======================================================
 # 💾 ORDER STORAGE & PERSISTENCE
 # ======================================================
+# Resolved once at import: backend/orders next to src/
+ORDERS_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "orders"))
+
 def get_orders_folder():
     """📁 Get the orders directory path"""
-    base_dir = os.path.dirname(__file__)   # src/
-    backend_dir = os.path.abspath(os.path.join(base_dir, ".."))
-    folder = os.path.join(backend_dir, "orders")
-    os.makedirs(folder, exist_ok=True)
-    return folder
+    os.makedirs(ORDERS_FOLDER, exist_ok=True)
+    return ORDERS_FOLDER
 
 def save_order_to_json(order: OrderState) -> str:
-    """💾 Save order to JSON file with enhanced logging"""
-    print(f"\n🔄 ATTEMPTING TO SAVE ORDER...")
+    """💾 Save order to a new JSON file and return its path"""
     folder = get_orders_folder()
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"order_{timestamp}.json"
+    now = datetime.now()
+    timestamp = now.strftime("%Y%m%d_%H%M%S")
+    # Random suffix keeps concurrent sessions in the same second from colliding
+    suffix = uuid.uuid4().hex[:8]
+    filename = f"order_{timestamp}_{suffix}.json"
     path = os.path.join(folder, filename)
 
-    try:
-        order_data = order.to_dict()
-        order_data["timestamp"] = datetime.now().isoformat()
-        order_data["session_id"] = f"session_{timestamp}"
-        
-        with open(path, "w", encoding='utf-8') as f:
-            json.dump(order_data, f, indent=4, ensure_ascii=False)
-        
-        print("\n" + "✅" * 30)
-        print("🎉 ORDER SAVED SUCCESSFULLY!")
-        print(f"📁 Location: {path}")
-        print(f"👤 Customer: {order.name}")
-        print(f"☕ Order: {order.get_summary()}")
-        print("✅" * 30 + "\n")
-        
-        return path
-        
-    except Exception as e:
-        print(f"\n❌ CRITICAL ERROR SAVING ORDER: {e}")
-        print(f"📁 Attempted path: {path}")
-        print("🚨 Please check directory permissions!")
-        raise e
-
-# ======================================================
-# 🧪 SYSTEM VALIDATION & TESTING
-# ======================================================
-def test_order_saving():
-    """🧪 Test function to verify order saving works"""
-    print("\n🧪 RUNNING ORDER SAVING TEST...")
+    order_data = order.to_dict()
+    order_data["timestamp"] = now.isoformat()
+    order_data["session_id"] = f"session_{timestamp}_{suffix}"
     
-    test_order = OrderState()
-    test_order.drinkType = "latte"
-    test_order.size = "medium"
-    test_order.milk = "oat"
-    test_order.extras = ["extra shot", "vanilla"]
-    test_order.name = "TestCustomer"
-    
-    try:
-        path = save_order_to_json(test_order)
-        print(f"🎯 TEST RESULT: ✅ SUCCESS - Saved to {path}")
-        return True
-    except Exception as e:
-        print(f"🎯 TEST RESULT: ❌ FAILED - {e}")
-        return False
+    # "x" never overwrites an existing order file
+    with open(path, "x", encoding='utf-8') as f:
+        json.dump(order_data, f, indent=4, ensure_ascii=False)
+
+    logger.info("💾 order saved to %s", path)
+    return path
 
 # ======================================================
 # 🔧 SYSTEM INITIALIZATION & PREWARMING
 # ======================================================
+_vad = None
+
 def prewarm(proc: JobProcess):
     """🔥 Preload VAD model for better performance"""
-    print("🔥 Prewarming VAD model...")
-    proc.userdata["vad"] = silero.VAD.load()
-    print("✅ VAD model loaded successfully!")
+    global _vad
+    # Load at most once per process, even if prewarm runs again
+    if _vad is None:
+        _vad = silero.VAD.load()
+        logger.info("✅ VAD model loaded")
+    proc.userdata["vad"] = _vad
 
 # ======================================================
 # 🎬 AGENT SESSION MANAGEMENT
@@ -325,15 +308,10 @@ async def entrypoint(ctx: JobContext):
     """🎬 Main agent entrypoint - handles customer sessions"""
     ctx.log_context_fields = {"room": ctx.room.name}
 
-    # Run test to verify everything works
-    test_order_saving()
-
     # Create user session data with empty order
     userdata = Userdata(order=create_empty_order())
     
-    session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-    print(f"\n🆕 NEW CUSTOMER SESSION: {session_id}")
-    print(f"📝 Initial order state: {userdata.order.get_summary()}\n")
+    logger.info("🆕 new customer session in room %s", ctx.room.name)
 
     # Create session with userdata
     session = AgentSession(
@@ -347,6 +325,13 @@ async def entrypoint(ctx: JobContext):
         turn_detection=MultilingualModel(),
         vad=ctx.proc.userdata["vad"],
         userdata=userdata,  # Pass userdata to session
+        # Start LLM/TTS inference while the user's turn is still being confirmed.
+        # Only inference is speculative: tool calls wait until the turn is
+        # committed, so a mispredicted turn never touches the order or disk
+        preemptive_generation=True,
+        # Replies are short menu picks, so answer soon after the turn detector
+        # predicts end of turn; pauses it is unsure about still get the default max
+        min_endpointing_delay=0.2,
     )
 
     # Metrics collection
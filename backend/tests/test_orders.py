@@ -0,0 +1,88 @@
+import json
+import os
+import re
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import agent
+from agent import OrderState, Userdata
+
+
+def _complete_order() -> OrderState:
+    return OrderState(
+        drinkType="latte",
+        size="medium",
+        milk="oat",
+        extras=["extra shot", "vanilla"],
+        name="TestCustomer",
+    )
+
+
+@pytest.fixture
+def orders_folder(tmp_path, monkeypatch) -> str:
+    """Redirect order files to a temporary folder instead of backend/orders."""
+    folder = str(tmp_path / "orders")
+    monkeypatch.setattr(agent, "ORDERS_FOLDER", folder)
+    return folder
+
+
+def test_save_order_writes_file(orders_folder: str) -> None:
+    """Saving a complete order creates the orders folder and one JSON file in it."""
+    path = agent.save_order_to_json(_complete_order())
+
+    assert os.path.dirname(path) == orders_folder
+    assert os.listdir(orders_folder) == [os.path.basename(path)]
+
+
+def test_orders_saved_in_same_second_get_distinct_files(orders_folder: str) -> None:
+    """Back-to-back saves never overwrite each other and keep the full order data."""
+    order = _complete_order()
+    paths = [agent.save_order_to_json(order), agent.save_order_to_json(order)]
+
+    names = sorted(os.listdir(orders_folder))
+    assert names == sorted(os.path.basename(p) for p in paths)
+    assert len(set(names)) == 2
+    for name in names:
+        assert re.fullmatch(r"order_\d{8}_\d{6}_[0-9a-f]{8}\.json", name)
+
+    session_ids = set()
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        timestamp = data.pop("timestamp")
+        session_id = data.pop("session_id")
+        assert data == order.to_dict()
+        datetime.fromisoformat(timestamp)
+        # session_id reuses the file name's timestamp and suffix
+        assert os.path.basename(path) == f"order_{session_id.removeprefix('session_')}.json"
+        session_ids.add(session_id)
+    assert len(session_ids) == 2
+
+
+def _ctx() -> SimpleNamespace:
+    """Minimal stand-in for RunContext: the order tools only read ctx.userdata."""
+    return SimpleNamespace(userdata=Userdata(order=OrderState()))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", ["", "   ", "\t\n"])
+async def test_set_name_rejects_blank_names(name: str) -> None:
+    """A blank name re-asks the customer and leaves the order without a name."""
+    ctx = _ctx()
+
+    result = await agent.set_name(ctx, name)
+
+    assert result == "👤 Sorry, I didn't catch the name - could you say it again?"
+    assert ctx.userdata.order.name is None
+
+
+@pytest.mark.asyncio
+async def test_set_name_collapses_whitespace() -> None:
+    """Names are trimmed, inner whitespace collapsed, and title-cased."""
+    ctx = _ctx()
+
+    await agent.set_name(ctx, "  mary   ann ")
+
+    assert ctx.userdata.order.name == "Mary Ann"